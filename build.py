@@ -5,11 +5,36 @@ import glob
 import shutil
 import stat
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+def build_script(script_path, project_root):
+    """
+    Compiles a single script to a native onefile binary with Nuitka. Nuitka
+    keeps its intermediate files in per-script directories under dist/, so
+    concurrent builds don't share state.
+    """
+    binary_name = os.path.splitext(os.path.basename(script_path))[0]
+    subprocess.run(
+        [
+            ".venv/bin/python",
+            "-m", "nuitka",
+            "--onefile",
+            "--lto=yes",
+            "--assume-yes-for-downloads",
+            "--output-dir=dist",
+            f"--output-filename={binary_name}", # Same name PyInstaller produced
+            script_path,
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=project_root # Run nuitka from the project root
+    )
 
 def main():
     """
     Finds all 'check-*.py' scripts in the 'src' directory,
-    builds them using PyInstaller, and copies them to /usr/local/bin.
+    builds them using Nuitka, and copies them to /usr/local/bin.
     """
     project_root = os.path.dirname(os.path.abspath(__file__))
     src_dir = os.path.join(project_root, "src")
@@ -29,28 +54,21 @@ def main():
         return
 
     print("Building scripts...")
-    for script_path in scripts_to_build:
-        print(f"  - Building {script_path}")
-        try:
-            # Using PyInstaller to build the script
-            # --clean: Clean PyInstaller cache and remove temporary files before building.
-            subprocess.run(
-                [
-                    ".venv/bin/pyinstaller",
-                    "--onefile",
-                    "--clean",
-                    script_path,
-                ],
-                check=True,
-                capture_output=True,
-                text=True,
-                cwd=project_root # Run pyinstaller from the project root
-            )
-        except subprocess.CalledProcessError as e:
-            print(f"ERROR: Failed to build {os.path.basename(script_path)}.")
-            print(e.stdout)
-            print(e.stderr)
-            sys.exit(1)
+    max_workers = min(len(scripts_to_build), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_script = {
+            executor.submit(build_script, script_path, project_root): script_path for script_path in scripts_to_build
+        }
+        for future in as_completed(future_to_script):
+            script_path = future_to_script[future]
+            try:
+                future.result()
+                print(f"  - Built {script_path}")
+            except subprocess.CalledProcessError as e:
+                print(f"ERROR: Failed to build {os.path.basename(script_path)}.")
+                print(e.stdout)
+                print(e.stderr)
+                sys.exit(1)
 
     print("\nSetting permissions and copying files...")
     for script_path in scripts_to_build:
@@ -5,10 +5,20 @@ A script to check DNS resolution against specified DNS servers (Pi-holes)
 using rich for formatted output.
 """
 
-import dns.resolver
+import argparse
+import asyncio
+import json
+import time
+import dns.asyncquery
 import dns.exception
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import dns.flags
+import dns.message
+import dns.rcode
+import dns.rdatatype
+from contextlib import nullcontext
 from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 from rich.console import Console
 from rich.table import Table
@@ -21,6 +31,7 @@ from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn
 PIHOLE1 = "10.0.0.5"  # Primary Pi-hole (this machine)
 PIHOLE2 = "10.0.0.3"  # Secondary Pi-hole
 DNS_TIMEOUT = 1.0     # Timeout for DNS queries in seconds
+CACHE_FILE = Path.home() / ".cache/check-dns/cache.json"  # Used with --cache
 
 WEBSITES = [
     "google.com",
@@ -54,34 +65,122 @@ class SiteCheckResult:
     display_ipv4: str = "-"
     display_ipv6: str = "-"
 
-def get_dns_records(website: str, server: str) -> DNSQueryResult:
-    """Queries a DNS server for A and AAAA records for a given website."""
-    resolver = dns.resolver.Resolver()
-    resolver.nameservers = [server]
-    resolver.lifetime = DNS_TIMEOUT
+# Caps the number of queries in flight so a burst doesn't trip the Pi-holes'
+# rate limiting, while still covering A and AAAA for several sites at once.
+MAX_DNS_QUERIES = min(len(WEBSITES) * 2, 16)
 
-    ipv4, ipv6 = "-", "-"
+# Answers keyed by (server, website, record type), each stored with the Unix
+# time it expires at. Only populated from disk when run with --cache.
+ANSWER_CACHE: Dict[Tuple[str, str, str], Tuple[str, float]] = {}
+
+def get_cached_answer(key: Tuple[str, str, str]) -> Optional[str]:
+    """Returns an unexpired cached answer, or None if there isn't one."""
+    entry = ANSWER_CACHE.get(key)
+    if entry is None:
+        return None
+    answer, expires = entry
+    if expires <= time.time():
+        ANSWER_CACHE.pop(key, None)
+        return None
+    return answer
+
+def load_cache():
+    """Loads unexpired answers saved by a previous run into ANSWER_CACHE."""
+    try:
+        entries = json.loads(CACHE_FILE.read_text())
+        now = time.time()
+        for server, website, rdtype, answer, expires in entries:
+            if expires > now:
+                ANSWER_CACHE[(server, website, rdtype)] = (answer, expires)
+    except (OSError, ValueError, TypeError):
+        pass # A missing or corrupt cache just means querying everything
+
+def save_cache():
+    """Saves the unexpired answers in ANSWER_CACHE for the next run."""
+    now = time.time()
+    entries = [[*key, answer, expires] for key, (answer, expires) in ANSWER_CACHE.items() if expires > now]
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        CACHE_FILE.write_text(json.dumps(entries))
+    except OSError:
+        pass
+
+def extract_answer(response: dns.message.Message, rdtype: dns.rdatatype.RdataType) -> Tuple[str, Optional[int]]:
+    """Picks the answer for a record type from a response, along with how long it may be cached.
+
+    Negative answers (NXDOMAIN or no records of that type) are cached for the
+    SOA's negative TTL. Anything else that failed is not cached at all.
+    """
+    # The answer section may start with a CNAME chain, so pick the first
+    # rrset of the requested type. The chain expires with its shortest TTL.
+    for rrset in response.answer:
+        if rrset.rdtype == rdtype and rrset:
+            return str(rrset[0]), min(r.ttl for r in response.answer)
+
+    if response.rcode() not in (dns.rcode.NOERROR, dns.rcode.NXDOMAIN):
+        return "-", None
+    for rrset in response.authority:
+        if rrset.rdtype == dns.rdatatype.SOA and rrset:
+            return "-", min(rrset.ttl, rrset[0].minimum)
+    return "-", None
+
+async def query_server(query: dns.message.Message, server: str) -> dns.message.Message:
+    """Sends a query over UDP, retrying over TCP if the reply is lost or truncated.
+
+    Each transport gets half of DNS_TIMEOUT, so a dropped UDP packet costs at
+    most one fallback attempt instead of failing the whole lookup.
+    """
+    attempt_timeout = DNS_TIMEOUT / 2
     try:
-        # Query for A record (IPv4)
-        a_records = resolver.resolve(website, 'A')
-        ipv4 = str(a_records[0]) if a_records else "-"
-    except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.exception.Timeout, dns.resolver.NoNameservers):
-        pass # Keep default "-"
+        response = await dns.asyncquery.udp(query, server, timeout=attempt_timeout)
+        if not response.flags & dns.flags.TC:
+            return response
+    except dns.exception.Timeout:
+        pass
+    return await dns.asyncquery.tcp(query, server, timeout=attempt_timeout)
+
+async def resolve_record(website: str, server: str, rdtype: dns.rdatatype.RdataType, limit: asyncio.Semaphore) -> str:
+    """Queries a DNS server for a single record type, returning "-" if none.
+
+    The query goes straight to the server; there is no stub resolver,
+    so no resolv.conf, search domains or nameserver rotation are involved.
+    Unexpired answers in ANSWER_CACHE are returned without a query, and
+    `limit` bounds how many queries are in flight at once.
+    """
+    key = (server, website, dns.rdatatype.to_text(rdtype))
+    cached = get_cached_answer(key)
+    if cached is not None:
+        return cached
 
+    query = dns.message.make_query(website, rdtype)
     try:
-        # Query for AAAA record (IPv6)
-        aaaa_records = resolver.resolve(website, 'AAAA')
-        ipv6 = str(aaaa_records[0]) if aaaa_records else "-"
-    except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.exception.Timeout, dns.resolver.NoNameservers):
-        pass # Keep default "-"
+        async with limit:
+            response = await query_server(query, server)
+    except (dns.exception.DNSException, OSError):
+        return "-"
 
+    answer, ttl = extract_answer(response, rdtype)
+    if ttl:
+        ANSWER_CACHE[key] = (answer, time.time() + ttl)
+    return answer
+
+def build_query_result(ipv4: str, ipv6: str) -> DNSQueryResult:
+    """Builds the query result for a server from its A and AAAA answers."""
     status = "OK" if ipv4 != "-" or ipv6 != "-" else "FAIL"
     return DNSQueryResult(status=status, ipv4=ipv4, ipv6=ipv6)
 
-def check_site(site: str) -> SiteCheckResult:
+async def check_site(site: str, limit: asyncio.Semaphore) -> SiteCheckResult:
     """Performs DNS checks for a single site against both Pi-holes."""
-    ph1_result = get_dns_records(site, PIHOLE1)
-    ph2_result = get_dns_records(site, PIHOLE2)
+    # Run the A and AAAA lookups for both Pi-holes at once so they overlap
+    # instead of each waiting on the previous query's round trip.
+    ph1_a, ph1_aaaa, ph2_a, ph2_aaaa = await asyncio.gather(
+        resolve_record(site, PIHOLE1, dns.rdatatype.A, limit),
+        resolve_record(site, PIHOLE1, dns.rdatatype.AAAA, limit),
+        resolve_record(site, PIHOLE2, dns.rdatatype.A, limit),
+        resolve_record(site, PIHOLE2, dns.rdatatype.AAAA, limit),
+    )
+    ph1_result = build_query_result(ph1_a, ph1_aaaa)
+    ph2_result = build_query_result(ph2_a, ph2_aaaa)
 
     # Determine which IP to display, preferring Pi-hole 1
     display_ipv4 = ph1_result.ipv4 if ph1_result.ipv4 != "-" else ph2_result.ipv4
@@ -95,27 +194,44 @@ def check_site(site: str) -> SiteCheckResult:
         display_ipv6=display_ipv6
     )
 
-def run():
-    """Main script execution."""
-    console = Console()
+async def check_sites(console: Console) -> Dict[str, SiteCheckResult]:
+    """Checks every website concurrently on one event loop, showing a spinner."""
     results = {}
+    limit = asyncio.Semaphore(MAX_DNS_QUERIES)
 
     progress = Progress(
         SpinnerColumn(),
         transient=True
     )
 
-    with Live(progress, console=console):
-        with ThreadPoolExecutor() as executor:
-            task = progress.add_task("DNS Checks", total=len(WEBSITES), site=WEBSITES[0])
-            future_to_site = {executor.submit(check_site, site): site for site in WEBSITES}
-            for i, future in enumerate(as_completed(future_to_site)):
-                site = future_to_site[future]
-                try:
-                    results[site] = future.result()
-                except Exception as e:
-                    console.print(f"Error checking {site}: {e}", style="bold red")
-                progress.update(task, advance=1, site=WEBSITES[i] if i < len(WEBSITES) else "")
+    # Only animate the spinner on a terminal; in a pipe or log it is never seen.
+    live = Live(progress, console=console, refresh_per_second=8) if console.is_terminal else nullcontext()
+    with live:
+        task = progress.add_task("DNS Checks", total=len(WEBSITES), site=WEBSITES[0])
+        task_to_site = {asyncio.create_task(check_site(site, limit)): site for site in WEBSITES}
+        async for site_task in asyncio.as_completed(task_to_site):
+            site = task_to_site[site_task]
+            try:
+                results[site] = site_task.result()
+            except Exception as e:
+                console.print(f"Error checking {site}: {e}", style="bold red")
+            progress.update(task, advance=1, site=site)
+    return results
+
+def run():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description="Check DNS resolution against the Pi-holes.")
+    parser.add_argument("-c", "--cache", action="store_true", help=f"Reuse unexpired answers from previous runs (stored in {CACHE_FILE}).")
+    args = parser.parse_args()
+
+    if args.cache:
+        load_cache()
+
+    console = Console()
+    results = asyncio.run(check_sites(console))
+
+    if args.cache:
+        save_cache()
 
     # --- Build and print the results table ---
     table = Table(title="DNS Resolution Check")
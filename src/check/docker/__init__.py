@@ -1,16 +1,18 @@
 #!/home/scott/code/projects/check-servers/.venv/bin/python3
-from datetime import datetime, timezone
 """
 A script to check the status of Docker containers on local or remote hosts.
 Replicates the functionality of check-docker.sh with a rich UI.
 """
 
 import argparse
+import atexit
+import re
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 
 import docker
 from docker.errors import APIError, DockerException
+from docker.utils import kwargs_from_env
 from rich.console import Console
 from rich.table import Table
 
@@ -21,6 +23,10 @@ USER_CONFIG_DIR = Path.home() / ".config/check-docker"
 USER_CONFIG_FILE = USER_CONFIG_DIR / "servers.conf"
 SYSTEM_CONFIG_FILE = Path("/etc/check-docker/servers.conf")
 
+# Docker API clients keyed by daemon host (None for the environment's default),
+# so the transport and any SSH/TLS session is only set up once per host.
+CLIENT_CACHE: Dict[Optional[str], docker.APIClient] = {}
+
 # ==========================================
 # DATA CLASSES & FUNCTIONS
 # ==========================================
@@ -47,21 +53,67 @@ def find_config_file() -> Optional[Path]:
 def parse_config(config_file: Path) -> List[str]:
     """Parses the docker configuration file for a list of container names."""
     container_names = []
-    with open(config_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            container_names.append(line)
-    return container_names
+    # Same scanning approach as check-servers: one read, then byte-level
+    # filtering so only the container names themselves are decoded.
+    for raw_line in config_file.read_bytes().splitlines():
+        line = raw_line.strip()
+        if not line or line[:1] == b'#':
+            continue
+        container_names.append(line.decode())
+    # Drop repeated names while keeping the order they were listed in
+    return list(dict.fromkeys(container_names))
+
+def get_client(host: Optional[str] = None) -> docker.APIClient:
+    """Returns a cached low-level Docker API client for the given host, creating it on first use."""
+    client = CLIENT_CACHE.get(host)
+    if client is None:
+        if host is None:
+            client = docker.APIClient(**kwargs_from_env())
+        else:
+            client = docker.APIClient(base_url=f"ssh://{host}")
+        CLIENT_CACHE[host] = client
+    return client
+
+def close_clients():
+    """Closes every cached Docker client."""
+    for client in CLIENT_CACHE.values():
+        client.close()
+    CLIENT_CACHE.clear()
+
+atexit.register(close_clients)
+
+def format_ports(ports: List[Dict[str, Any]]) -> str:
+    """Formats the port list from /containers/json, e.g. '0.0.0.0:8080->80/tcp'."""
+    port_list = []
+    for port in ports:
+        container_port = f"{port['PrivatePort']}/{port['Type']}"
+        if 'PublicPort' in port:
+            port_list.append(f"{port.get('IP', '')}:{port['PublicPort']}->{container_port}")
+        else:
+            port_list.append(container_port) # Exposed but not published
+    return ', '.join(port_list) if port_list else "--"
 
 def get_container_details(container_names: List[str]) -> List[DockerInfo]:
     """Gets detailed information for a list of containers on localhost."""
     results = []
     try:
-        client = docker.from_env()
-        all_host_containers = client.containers.list(all=True)
-        container_map = {c.name: c for c in all_host_containers}
+        client = get_client()
+        # A single /containers/json request returns state, image, networks and
+        # ports for every container, so no per-container inspect is needed.
+        # Let the daemon do the filtering; the name filter is a regex matched
+        # against '/<name>', so anchor and escape it to get exact matches.
+        name_filters = [f"^/{re.escape(name)}$" for name in container_names]
+        all_host_containers = client.containers(all=True, filters={"name": name_filters})
+        # Only keep the containers we were asked about, and stop once all are found.
+        wanted = set(container_names)
+        container_map: Dict[str, Dict[str, Any]] = {}
+        for c in all_host_containers:
+            for container_name in c.get('Names', []):
+                container_name = container_name.lstrip('/')
+                if container_name in wanted:
+                    container_map[container_name] = c
+            if len(container_map) == len(wanted):
+                break
 
         for name in container_names:
             container = container_map.get(name)
@@ -69,39 +121,30 @@ def get_container_details(container_names: List[str]) -> List[DockerInfo]:
                 results.append(DockerInfo(name=name, status="Not Found", uptime="--", image="--", networks="--", ports="--"))
                 continue
 
-            attrs = container.attrs
-            state = attrs.get('State', {})
-            
-            # Uptime
+            status = container.get('State', '--')
+
+            # Uptime, from the daemon's human readable status, e.g. "Up 3 hours (healthy)".
+            # /containers/json has no StartedAt, so this is the daemon's relative
+            # wording ("3 hours (healthy)") rather than an exact H:MM:SS duration.
             uptime_str = "--"
-            if state.get('Running') and 'StartedAt' in state:
-                start_time_str = state['StartedAt'].split('.')[0] + 'Z' # Format for UTC
-                start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
-                uptime_delta = datetime.now(timezone.utc) - start_time
-                uptime_str = str(uptime_delta).split('.')[0] # Remove microseconds
+            if status == "running":
+                uptime_str = container.get('Status', '--').removeprefix('Up ')
+
+            # Image, shortened the same way docker-py's Image.short_id does
+            image_id = container.get('ImageID', '')
+            image = image_id[:19] if image_id.startswith('sha256:') else image_id[:12] or "--"
 
             # Networks
-            network_settings = attrs.get('NetworkSettings', {}).get('Networks', {})
+            network_settings = container.get('NetworkSettings', {}).get('Networks', {})
             networks = ', '.join(network_settings.keys())
 
-            # Ports
-            ports = attrs.get('NetworkSettings', {}).get('Ports', {})
-            port_list = []
-            for container_port, host_bindings in ports.items():
-                if host_bindings:
-                    for binding in host_bindings:
-                        port_list.append(f"{binding['HostIp']}:{binding['HostPort']}->{container_port}")
-                else:
-                    port_list.append(container_port) # Exposed but not published
-            ports_str = ', '.join(port_list) if port_list else "--"
-
             results.append(DockerInfo(
                 name=name,
-                status=container.status,
+                status=status,
                 uptime=uptime_str,
-                image=container.image.short_id,
+                image=image,
                 networks=networks,
-                ports=ports_str
+                ports=format_ports(container.get('Ports', []))
             ))
         
     except (APIError, DockerException) as e:
@@ -3,14 +3,25 @@ Core library for checking the status of local and remote servers.
 """
 
 import argparse
+from array import array
+import asyncio
+from contextlib import AbstractContextManager, nullcontext, suppress
 from dataclasses import dataclass
+import fcntl
+from functools import lru_cache
+import math
+import mmap
+import os
 import re
-import subprocess
+import shutil
+import struct
+import tempfile
+import time
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Optional, Dict, Tuple, Any
+from typing import List, Optional, Dict, Tuple, Any, Union
 import sys
 
+import icmplib
 from rich.console import Console
 from rich.table import Table
 from rich.live import Live
@@ -24,6 +35,64 @@ SYSTEM_CONFIG_FILE = Path("/etc/check-servers/servers.conf")
 # Status constants
 STATUS_OK = "OK"
 STATUS_DOWN = "DOWN"
+# How each status is shown in the results table
+STATUS_MARKUP = {STATUS_OK: "[green]OK[/green]", STATUS_DOWN: "[red]DOWN[/red]"}
+# Layout of a results line when output isn't going to a terminal
+PLAIN_ROW_FORMAT = "{:<20} {:<15} {:<6} {:<6} {:>10}"
+PLAIN_HEADER = PLAIN_ROW_FORMAT.format("SERVER", "ADDRESS", "TYPE", "STATUS", "TIME")
+
+# Per-server result codes stored in PingResults.statuses
+RESULT_NONE = 0 # Not checked, e.g. because the check itself failed
+RESULT_UP = 1
+RESULT_DOWN = 2
+
+# Raw ICMP sockets need root; everyone else relies on the kernel allowing
+# unprivileged datagram ICMP sockets (net.ipv4.ping_group_range).
+ICMP_PRIVILEGED = os.geteuid() == 0
+
+ICMPSocket = Union[icmplib.ICMPv4Socket, icmplib.ICMPv6Socket]
+
+# ICMP message types, for IPv4 and IPv6 respectively: echo requests, echo
+# replies, and the errors (unreachable, time exceeded, ...) that quote the
+# start of the request they're reporting on
+ICMP_ECHO_REQUEST = {False: 8, True: 128}
+ICMP_ECHO_REPLY = {False: 0, True: 129}
+ICMP_ERRORS = {False: frozenset((3, 4, 5, 11, 12)), True: frozenset((1, 2, 3, 4))}
+
+# Upper bound on ping processes running at once when falling back to the ping
+# command. ICMP echoes all share one socket, so they aren't limited at all.
+MAX_PING_PROCESSES = 32
+
+# Minimum seconds between progress bar updates while results come in
+PROGRESS_UPDATE_INTERVAL = 0.05
+
+# Seconds between packets when the ping command sends several; 0.2 is the
+# shortest interval ping allows for unprivileged users.
+PING_INTERVAL = 0.2
+
+# fping, if installed, pings every server from one process when ICMP sockets
+# aren't permitted, instead of running the ping command once per server
+FPING_PATH = shutil.which("fping")
+
+# Matches the round-trip time in the ping command's output, e.g. b"time=0.523 ms"
+PING_TIME_RE = re.compile(rb"time=([\d.]+)\s*ms")
+# Matches the average in the ping command's summary, e.g. b"min/avg/max/mdev = 0.4/0.5/0.6/0.1 ms"
+PING_AVG_RE = re.compile(rb"min/avg/max\S* = [\d.]+/([\d.]+)/")
+# Matches a target's line in fping's -C summary, e.g. b"1.1.1.1 : 11.5 - 12.1"
+FPING_RESULT_RE = re.compile(rb"^(\S+)\s+: ([\d.\- ]+)$", re.MULTILINE)
+
+# Matches one meaningful line of the config file: a [section] header, a
+# "key = value" setting, or an "ip name" server entry. Comments, blank lines
+# and anything else don't match and are skipped.
+CONFIG_LINE_RE = re.compile(rb"""
+    ^[ \t]*(?:
+        \[(?P<section>[^\]\n]*)\]
+      | (?P<key>[^=\n]*?)[ \t]*=[ \t]*(?P<value>[^\n]*?)
+      | (?P<ip>[^\s\#\[]\S*)[ \t]+(?P<name>\S[^\n]*?)
+    )[ \t]*\r?$
+""", re.MULTILINE | re.VERBOSE)
+# Settings that can be overridden from the config file, and how each is parsed
+SETTING_PARSERS = {'timeout': float, 'retries': int}
 
 # ==========================================
 # DATA CLASSES & FUNCTIONS
@@ -40,53 +109,119 @@ class PingResult:
     status: str
     latency: Optional[float] = None # in ms
 
+@dataclass
+class PingResults:
+    """Results for a list of servers, kept in parallel arrays indexed by each server's position in it."""
+    statuses: bytearray # RESULT_* code for each server
+    latencies: array    # Round trip in ms for each server, NaN if there isn't one
+
+    @classmethod
+    def empty(cls, count: int) -> "PingResults":
+        """Creates results for `count` servers, none of which have been checked yet."""
+        return cls(statuses=bytearray(count), latencies=array('d', [math.nan]) * count)
+
+    def record(self, index: int, result: PingResult):
+        """Stores the result of pinging the server at `index`."""
+        self.statuses[index] = RESULT_UP if result.status == STATUS_OK else RESULT_DOWN
+        if result.latency is not None:
+            self.latencies[index] = result.latency
+
+def is_system_config(config_file: Path) -> bool:
+    """Checks whether a path refers to the system-wide config file, however it's spelled."""
+    try:
+        return config_file.samefile(SYSTEM_CONFIG_FILE)
+    except OSError:
+        # If either file is missing they can't be the same file
+        return False
+
+@lru_cache(maxsize=1)
 def find_config_file() -> Optional[Path]:
-    """Finds the configuration file in user or system paths."""
-    if USER_CONFIG_FILE.exists():
-        return USER_CONFIG_FILE
+    """Finds the configuration file in user or system paths.
+
+    The result is cached for the rest of the run; call
+    find_config_file.cache_clear() after creating or removing a config file.
+    """
+    # List the user config directory rather than stat'ing the file; the
+    # directory entries already say whether the file is there.
+    with suppress(OSError), os.scandir(USER_CONFIG_DIR) as entries:
+        if any(entry.name == USER_CONFIG_FILE.name and entry.is_file() for entry in entries):
+            return USER_CONFIG_FILE
     if SYSTEM_CONFIG_FILE.exists():
         return SYSTEM_CONFIG_FILE
     return None
 
-def parse_config(config_file: Path) -> Tuple[Dict[str, Any], List[Server]]:
-    """Parses the server configuration file."""
+def parse_config(config_file: Path, dedupe: bool = True) -> Tuple[Dict[str, Any], List[Server]]:
+    """Parses the server configuration file.
+
+    With `dedupe`, an address listed more than once only appears once (the
+    first entry wins); otherwise every server entry is returned as written.
+    Results are cached by the file's modification time and size, so parsing
+    an unchanged file again only costs a stat. Callers get their own copies
+    of the settings and server list.
+    """
+    try:
+        stat = config_file.stat()
+    except IOError as e:
+        raise IOError(f"Error reading configuration file {config_file}: {e}") from e
+    settings, servers = parse_config_file(config_file, stat.st_mtime_ns, stat.st_size)
+    if dedupe:
+        servers, _ = dedupe_servers(servers)
+    return dict(settings), list(servers)
+
+def dedupe_servers(servers: List[Server]) -> Tuple[List[Server], List[Tuple[Server, Server]]]:
+    """Drops servers whose address is already listed, so each is only pinged once.
+
+    Returns the servers to keep, along with (dropped, kept) pairs for each
+    dropped entry and the earlier entry with the same address.
+    """
+    first_by_ip: Dict[str, Server] = {}
+    kept, duplicates = [], []
+    for server in servers:
+        first = first_by_ip.setdefault(server.ip, server)
+        if first is server:
+            kept.append(server)
+        else:
+            duplicates.append((server, first))
+    return kept, duplicates
+
+@lru_cache(maxsize=8)
+def parse_config_file(config_file: Path, mtime_ns: int, size: int) -> Tuple[Dict[str, Any], List[Server]]:
+    """Parses the configuration file as of the given modification time and size."""
     settings: Dict[str, Any] = {
         'timeout': 0.2,
         'retries': 3,
     }
     servers = []
     current_section = None
+    if size == 0:
+        return settings, servers # mmap can't map an empty file
     try:
-        with open(config_file, 'r') as f:
-            for i, line in enumerate(f, 1):
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-
-                if line.startswith('[') and line.endswith(']'):
-                    current_section = line[1:-1]
-                    continue
-
-                if '=' in line:
-                    parts = line.split('=', 1)
-                    if len(parts) != 2: continue
-                    key, value = parts[0].strip(), parts[1].strip()
-                    if key in settings:
-                        try:
-                            settings[key] = float(value) if '.' in value else int(value)
-                        except ValueError:
-                            # Silently ignore malformed settings, or print a warning
-                            # print(f"Warning: Invalid value for '{key}' on line {i} in {config_file}")
-                            pass
-                elif current_section in ['local', 'remote']:
-                    parts = line.split(maxsplit=1)
-                    if len(parts) >= 2:
-                        ip, name = parts[0], parts[1]
-                        servers.append(Server(ip=ip, name=name, type=current_section))
-    except IOError as e:
+        # Scan the file through a read-only mapping as bytes instead of copying
+        # it into a buffer; only the keys, values and server fields that
+        # survive filtering are copied out and decoded.
+        with open(config_file, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (IOError, ValueError) as e:
         # This provides a more specific error if the file is unreadable
         raise IOError(f"Error reading configuration file {config_file}: {e}") from e
 
+    with data:
+        for match in CONFIG_LINE_RE.finditer(data):
+            section, key, value, ip, name = match.group('section', 'key', 'value', 'ip', 'name')
+            if section is not None:
+                current_section = section.decode()
+            elif key is not None:
+                key = key.decode()
+                parser = SETTING_PARSERS.get(key)
+                if parser is not None:
+                    try:
+                        settings[key] = parser(value)
+                    except ValueError:
+                        # Silently ignore malformed settings
+                        pass
+            elif current_section in ('local', 'remote'):
+                servers.append(Server(ip=ip.decode(), name=name.decode(), type=current_section))
+
     return settings, servers
 
 def add_server_to_config(ip: str, name: str, server_type: str, console: Console):
@@ -99,27 +234,61 @@ def add_server_to_config(ip: str, name: str, server_type: str, console: Console)
         # Ensure the directory exists
         USER_CONFIG_DIR.mkdir(parents=True, exist_ok=True)
         config_file.touch()
+        find_config_file.cache_clear()
 
     # We should only add to the user's config file, not the system-wide one.
-    if str(config_file) == str(SYSTEM_CONFIG_FILE):
+    if is_system_config(config_file):
         console.print(f"[bold red]Error:[/bold red] Cannot add server to system-wide config at [cyan]{SYSTEM_CONFIG_FILE}[/cyan].")
         console.print("Please create a user config file at [cyan]~/.config/check-servers/servers.conf[/cyan].")
         return
 
-    new_entry = f"{ip:<15} {name}\n"
-    
-    with open(config_file, "r+") as f:
-        content = f.read()
-        section_header = f"[{server_type}]"
-        if section_header in content:
-            # Find the section and append the server
-            content = content.replace(section_header, f"{section_header}\n{new_entry}", 1)
-        else:
+    _, servers = parse_config(config_file, dedupe=False)
+    existing = next((s for s in servers if s.ip == ip), None)
+    if existing:
+        console.print(f"[yellow]Warning:[/yellow] {ip} is already listed as [cyan]{existing.name}[/cyan], "
+                      f"so [cyan]{name}[/cyan] won't be checked until that entry is removed.")
+
+    new_entry = f"{ip:<15} {name}\n".encode()
+
+    with open(config_file, "rb+") as f:
+        # Hold an exclusive lock so concurrent 'add' commands can't interleave
+        fcntl.flock(f, fcntl.LOCK_EX)
+        size = os.fstat(f.fileno()).st_size
+        section_start = None # Offset just past the target section's header line
+        last_section = None
+        ends_with_newline = True
+        tail = b""
+        if size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                # Find the headers the same way parse_config does, so the
+                # entry ends up in the section the parser will read it from.
+                for match in CONFIG_LINE_RE.finditer(data):
+                    section = match.group('section')
+                    if section is None:
+                        continue
+                    last_section = section.decode()
+                    if section_start is None and last_section == server_type:
+                        line_end = data.find(b"\n", match.end())
+                        section_start = size if line_end == -1 else line_end + 1
+                ends_with_newline = data[-1:] == b"\n"
+                if section_start is not None and last_section != server_type:
+                    tail = data[section_start:]
+
+        if section_start is None:
             # Add the section and the server at the end of the file
-            content += f"\n{section_header}\n{new_entry}"
-        f.seek(0)
-        f.write(content)
-    
+            f.seek(0, os.SEEK_END)
+            f.write(b"\n[" + server_type.encode() + b"]\n" + new_entry)
+        elif last_section == server_type:
+            # The entry belongs at the end of the file, so append it with a
+            # single write instead of rewriting everything before it.
+            f.seek(0, os.SEEK_END)
+            f.write(new_entry if ends_with_newline else b"\n" + new_entry)
+        else:
+            # The section is followed by another, so the entry has to be
+            # inserted mid-file: add it under the header and rewrite the rest.
+            f.seek(section_start)
+            f.write(new_entry + tail)
+
     console.print(f"Successfully added server [bold cyan]{name}[/bold cyan] ([green]{ip}[/green]) to [magenta]{config_file}[/magenta].")
 
 def remove_server_from_config(console: Console):
@@ -129,12 +298,13 @@ def remove_server_from_config(console: Console):
         console.print("[bold red]Error:[/bold red] No configuration file found to remove a server from.", style="error")
         return
 
-    if str(config_file) == str(SYSTEM_CONFIG_FILE):
+    if is_system_config(config_file):
         console.print(f"[bold red]Error:[/bold red] Cannot remove server from system-wide config at [cyan]{SYSTEM_CONFIG_FILE}[/cyan].")
         console.print("This command only works on the user config file at [cyan]~/.config/check-servers/servers.conf[/cyan].")
         return
 
-    _, servers = parse_config(config_file)
+    # List every entry, including repeats of an address, so any of them can be removed
+    _, servers = parse_config(config_file, dedupe=False)
     if not servers:
         console.print("[yellow]No servers found in the configuration file to remove.[/yellow]")
         return
@@ -156,114 +326,347 @@ def remove_server_from_config(console: Console):
 
     server_to_remove = servers[choice - 1]
 
-    with open(config_file, "r") as f:
-        lines = f.readlines()
-    
-    with open(config_file, "w") as f:
-        for line in lines:
-            if not (server_to_remove.ip in line and server_to_remove.name in line):
-                f.write(line)
+    # Stream every other line into a temporary file beside the config, then
+    # swap it into place so the config is never left half-written. The
+    # temporary file is deleted on the way out unless it was swapped in.
+    fields = [server_to_remove.ip, server_to_remove.name]
+    with open(config_file, "r") as src, \
+         tempfile.NamedTemporaryFile("w", dir=config_file.parent, delete_on_close=False) as dst:
+        for line in src:
+            if line.strip().split(maxsplit=1) != fields:
+                dst.write(line)
+        dst.close()
+        shutil.copystat(config_file, dst.name)
+        os.replace(dst.name, config_file)
 
     console.print(f"Successfully removed server [bold cyan]{server_to_remove.name}[/bold cyan] from [magenta]{config_file}[/magenta].")
 
-def ping_server(server: Server, timeout: float, retries: int) -> PingResult:
-    """Pings a server with retries and returns a result object."""
-    # Ensure timeout is a string for the command
-    timeout_str = str(timeout)
+def parse_icmp_reply(packet: bytes, ipv6: bool, has_ip_header: bool) -> Optional[Tuple[int, int, bool]]:
+    """Unpacks the identifier and sequence of the echo request an ICMP packet answers.
+
+    Returns (identifier, sequence, is_echo_reply), where is_echo_reply is False
+    for an error about the request, or None if the packet isn't about an echo
+    request at all.
+    """
+    offset = (packet[0] & 0x0F) * 4 if has_ip_header and packet else 0
+    if len(packet) < offset + 8:
+        return None
+    icmp_type = packet[offset]
+    if icmp_type == ICMP_ECHO_REPLY[ipv6]:
+        ident, sequence = struct.unpack_from("!HH", packet, offset + 4)
+        return ident, sequence, True
+    if icmp_type in ICMP_ERRORS[ipv6]:
+        # After the 8 byte error header comes the IP header of the packet it's
+        # about, followed by at least the first 8 bytes of its ICMP message.
+        quoted = offset + 8
+        if len(packet) <= quoted:
+            return None
+        request = quoted + (40 if ipv6 else (packet[quoted] & 0x0F) * 4)
+        if len(packet) < request + 8 or packet[request] != ICMP_ECHO_REQUEST[ipv6]:
+            return None
+        ident, sequence = struct.unpack_from("!HH", packet, request + 4)
+        return ident, sequence, False
+    return None
+
+class PingSocket:
+    """One ICMP socket per address family, shared by every ping on the event loop.
+
+    Echo requests are sent with a sequence number unique to this socket, and
+    replies are read as they arrive and handed to whichever ping is waiting on
+    that sequence, so any number of servers can be pinged without opening a
+    socket (or a ping process) for each. Sockets are opened on first use.
+    """
+
+    def __init__(self):
+        self.id = os.getpid() & 0xFFFF
+        self.sequence = 0
+        self.sockets: Dict[type, ICMPSocket] = {}
+        self.pending: Dict[int, Tuple[icmplib.ICMPRequest, asyncio.Future]] = {}
+
+    def get_socket(self, address: str) -> ICMPSocket:
+        """Returns the socket for the address's family, opening it if needed."""
+        socket_type = icmplib.ICMPv6Socket if icmplib.is_ipv6_address(address) else icmplib.ICMPv4Socket
+        sock = self.sockets.get(socket_type)
+        if sock is None:
+            # Raises icmplib.SocketPermissionError if ICMP sockets aren't permitted
+            sock = socket_type(privileged=ICMP_PRIVILEGED)
+            sock.blocking = False
+            asyncio.get_running_loop().add_reader(sock.sock, self.read_replies, sock)
+            self.sockets[socket_type] = sock
+        return sock
+
+    def read_replies(self, sock: ICMPSocket):
+        """Drains the replies waiting on a socket and resolves the pings they answer."""
+        while True:
+            try:
+                packet, source = sock.sock.recvfrom(1024)
+            except OSError:
+                return # Nothing left to read (BlockingIOError) or the socket failed
+            received = time.time()
+            ipv6 = isinstance(sock, icmplib.ICMPv6Socket)
+            # IPv4 packets come with their IP header, except from a datagram
+            # socket on Linux; IPv6 sockets never include it.
+            has_ip_header = not ipv6 and (sock.is_privileged or not sys.platform.startswith("linux"))
+            reply = parse_icmp_reply(packet, ipv6, has_ip_header)
+            if reply is None:
+                continue
+            ident, sequence, is_echo_reply = reply
+            request, future = self.pending.get(sequence, (None, None))
+            # A raw socket sees every ICMP packet on the host, so also check the
+            # identifier to skip replies meant for other ping processes.
+            if request is not None and ident == request.id and not future.done():
+                future.set_result((received, is_echo_reply))
+
+    async def echo(self, address: str, timeout: float) -> Optional[float]:
+        """Sends one echo request, returning the round trip in ms or None if there's no reply.
+
+        Raises icmplib.NameLookupError if a hostname doesn't resolve, and
+        icmplib.SocketPermissionError if ICMP sockets aren't permitted.
+        """
+        if icmplib.is_hostname(address):
+            address = (await icmplib.async_resolve(address))[0]
+        sock = self.get_socket(address)
+
+        self.sequence = (self.sequence + 1) & 0xFFFF
+        request = icmplib.ICMPRequest(destination=address, id=self.id, sequence=self.sequence)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request.sequence] = (request, future)
+        try:
+            # On Linux the kernel swaps in its own identifier for datagram
+            # sockets; send() updates the request so replies still match.
+            sock.send(request)
+            received, is_echo_reply = await asyncio.wait_for(future, timeout)
+        except (TimeoutError, icmplib.ICMPLibError):
+            # No reply in time or a send failure
+            return None
+        finally:
+            del self.pending[request.sequence]
+        if not is_echo_reply:
+            return None # An error reply, e.g. host unreachable
+        return (received - request.time) * 1000
+
+    def close(self):
+        """Stops reading from and closes the sockets."""
+        loop = asyncio.get_running_loop()
+        for sock in self.sockets.values():
+            loop.remove_reader(sock.sock)
+            sock.close()
+        self.sockets.clear()
+
+async def ping_server(server: Server, timeout: float, retries: int, pinger: PingSocket,
+                      fallback_limit: Optional[asyncio.Semaphore] = None) -> PingResult:
+    """Pings a server over the shared ICMP socket with retries and returns a result object.
+
+    Falls back to the system 'ping' command if the OS does not allow this
+    process to open ICMP sockets, holding `fallback_limit` while it runs.
+    """
     for _ in range(retries):
-        # Construct the ping command.
-        # -c 1: Send only one packet.
-        # -W <timeout>: Wait for a reply for <timeout> seconds.
-        command = ["ping", "-c", "1", f"-W{timeout}", server.ip]
-        
-        result = subprocess.run(command, capture_output=True, text=True)
-
-        # A return code of 0 means the ping was successful.
-        if result.returncode == 0:
-            # Use regex to find the time from the output, e.g., "time=0.523 ms"
-            match = re.search(r"time=([\d.]+)\s*ms", result.stdout)
-            if match:
-                latency = float(match.group(1))
-                return PingResult(server=server, status=STATUS_OK, latency=latency)
-        
-        # If ping fails (non-zero return code or no match), the loop continues to the next retry.
-        
+        try:
+            latency = await pinger.echo(server.ip, timeout)
+        except icmplib.SocketPermissionError:
+            async with fallback_limit or nullcontext():
+                return await ping_server_subprocess(server, timeout, retries)
+        except icmplib.NameLookupError:
+            break
+
+        if latency is not None:
+            return PingResult(server=server, status=STATUS_OK, latency=latency)
+
     return PingResult(server=server, status=STATUS_DOWN)
 
+async def ping_server_subprocess(server: Server, timeout: float, retries: int) -> PingResult:
+    """Pings a server with retries using a single run of the system 'ping' command."""
+    # Construct the ping command.
+    # -c <retries>: Send one packet per retry from the same process.
+    # -W <timeout>: Wait for a reply for <timeout> seconds.
+    # -i <interval>: Space the packets out by the shortest unprivileged interval.
+    command = ("ping", "-c", str(retries), f"-W{timeout}", "-i", str(PING_INTERVAL), server.ip)
+
+    # Output is kept as bytes; only the matched latency is ever decoded.
+    process = await asyncio.create_subprocess_exec(
+        *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+    )
+    stdout, _ = await process.communicate()
+
+    # A return code of 0 means at least one reply came back.
+    if process.returncode == 0:
+        # Prefer the average from the summary line, e.g. "rtt min/avg/max/mdev = 0.4/0.5/0.6/0.1 ms",
+        # falling back to the last per-packet time, e.g. "time=0.523 ms".
+        match = PING_AVG_RE.search(stdout)
+        if match:
+            return PingResult(server=server, status=STATUS_OK, latency=float(match.group(1)))
+        times = PING_TIME_RE.findall(stdout)
+        if times:
+            return PingResult(server=server, status=STATUS_OK, latency=float(times[-1]))
+
+    return PingResult(server=server, status=STATUS_DOWN)
+
+def icmp_sockets_permitted() -> bool:
+    """Checks whether the OS allows this process to open ICMP sockets."""
+    try:
+        icmplib.ICMPv4Socket(privileged=ICMP_PRIVILEGED).close()
+    except icmplib.SocketPermissionError:
+        return False
+    return True
+
+async def ping_servers_fping(servers_to_check: List[Server], timeout: float, retries: int) -> PingResults:
+    """Pings every server with a single run of fping, sending `retries` packets to each."""
+    # -q -C <retries>: Only print a per-target summary of each packet's time, or "-" if lost.
+    # -p <ms>: Space the packets to each target out by the ping command's interval.
+    # -t <ms>: Wait for each reply for <timeout>.
+    command = (
+        FPING_PATH, "-q", "-C", str(retries), "-p", str(int(PING_INTERVAL * 1000)),
+        "-t", str(int(timeout * 1000)), *(s.ip for s in servers_to_check),
+    )
+    process = await asyncio.create_subprocess_exec(
+        *command, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+    )
+    _, stderr = await process.communicate()
+
+    # Anything fping doesn't report a reply from (including names that don't
+    # resolve, which it only complains about) is down.
+    results = PingResults.empty(len(servers_to_check))
+    results.statuses[:] = bytes([RESULT_DOWN]) * len(servers_to_check)
+    index_by_ip = {s.ip: i for i, s in enumerate(servers_to_check)}
+    for match in FPING_RESULT_RE.finditer(stderr):
+        index = index_by_ip.get(match.group(1).decode())
+        times = [float(t) for t in match.group(2).split() if t != b"-"]
+        if index is not None and times:
+            results.statuses[index] = RESULT_UP
+            results.latencies[index] = sum(times) / len(times)
+    return results
+
 def get_servers_to_check(all_servers: List[Server], args: argparse.Namespace) -> List[Server]:
     """Filters the list of servers based on command-line arguments."""
     if args.local and not args.remote:
-        return [s for s in all_servers if s.type == 'local']
+        return servers_of_type(all_servers, 'local')
     if args.remote and not args.local:
-        return [s for s in all_servers if s.type == 'remote']
+        return servers_of_type(all_servers, 'remote')
     return all_servers
 
-def run_pings(servers_to_check: List[Server], settings: Dict[str, Any], console: Console) -> Dict[str, PingResult]:
-    """Executes the ping checks in parallel and shows a progress bar."""
-    results: Dict[str, PingResult] = {}
-    progress_columns = [SpinnerColumn()]
-    progress = Progress(*progress_columns, transient=True)
+def servers_of_type(all_servers: List[Server], server_type: str) -> List[Server]:
+    """Returns the servers of the given type, or the list itself if that's all of them."""
+    # all() stops at the first server of another type, so this only costs a
+    # full scan when no copy is needed.
+    if all(s.type == server_type for s in all_servers):
+        return all_servers
+    return [s for s in all_servers if s.type == server_type]
+
+def progress_display(progress: Progress, console: Console) -> AbstractContextManager:
+    """Returns a Live display for the progress, or a no-op when not writing to a terminal."""
+    # Nothing useful can be animated in a pipe or log file, so skip the
+    # render thread entirely instead of redrawing frames nobody will see.
+    if not console.is_terminal:
+        return nullcontext()
+    return Live(progress, console=console, refresh_per_second=8)
+
+def run_pings(servers_to_check: List[Server], settings: Dict[str, Any], console: Console) -> PingResults:
+    """Executes the ping checks concurrently and shows a progress bar."""
+    return asyncio.run(ping_servers(servers_to_check, settings, console))
+
+async def ping_servers(servers_to_check: List[Server], settings: Dict[str, Any], console: Console) -> PingResults:
+    """Pings every server as a coroutine on one event loop, collecting results as they finish.
+
+    If ICMP sockets aren't permitted and fping is installed, a single fping
+    run pings every server instead.
+    """
+    progress = Progress(SpinnerColumn(), transient=True)
+    timeout, retries = settings['timeout'], settings['retries']
+
+    if FPING_PATH and not icmp_sockets_permitted():
+        # Without ICMP sockets every server would need its own ping process,
+        # so let one fping process ping them all instead.
+        with progress_display(progress, console):
+            progress.add_task("Pinging servers...", total=None)
+            return await ping_servers_fping(servers_to_check, timeout, retries)
+
+    results = PingResults.empty(len(servers_to_check))
+    fallback_limit = asyncio.Semaphore(MAX_PING_PROCESSES)
+    pinger = PingSocket()
 
-    with Live(progress, console=console):
-        with ThreadPoolExecutor() as executor:
+    try:
+        with progress_display(progress, console):
             task = progress.add_task("Pinging servers...", total=len(servers_to_check))
-            future_to_server = {
-                executor.submit(ping_server, s, settings['timeout'], settings['retries']): s for s in servers_to_check
+            completed, last_update = 0, time.monotonic()
+            task_to_index = {
+                asyncio.create_task(ping_server(s, timeout, retries, pinger, fallback_limit)): i
+                for i, s in enumerate(servers_to_check)
             }
-            for future in as_completed(future_to_server):
+            async for ping_task in asyncio.as_completed(task_to_index):
+                index = task_to_index[ping_task]
                 try:
-                    res = future.result()
-                    results[res.server.name] = res
+                    results.record(index, ping_task.result())
                 except FileNotFoundError:
                     # Handle case where 'ping' command is not found
-                    server_name = future_to_server[future].name
+                    server_name = servers_to_check[index].name
                     console.print(f"[bold red]Error:[/bold red] 'ping' command not found. Cannot check '{server_name}'.")
                 except Exception as e:
                     # Catch other potential exceptions from ping_server
-                    server_name = future_to_server[future].name
+                    server_name = servers_to_check[index].name
                     console.print(f"[bold red]Error checking '{server_name}':[/bold red] {e}")
                 finally:
-                    progress.update(task, advance=1)
+                    # Coalesce completions so a burst of fast replies redraws
+                    # the progress bar once rather than once per server.
+                    completed += 1
+                    now = time.monotonic()
+                    if now - last_update >= PROGRESS_UPDATE_INTERVAL:
+                        progress.update(task, advance=completed)
+                        completed, last_update = 0, now
+            if completed:
+                progress.update(task, advance=completed)
+    finally:
+        pinger.close()
     return results
 
-def display_results(servers_to_check: List[Server], results: Dict[str, PingResult], args: argparse.Namespace, console: Console):
-    """Builds and prints the results table and summary stats."""
+def new_results_table() -> Table:
+    """Creates the empty results table."""
     table = Table(title="Server Status")
     table.add_column("SERVER", style="cyan", no_wrap=True)
     table.add_column("ADDRESS", style="magenta")
     table.add_column("TYPE", style="blue")
     table.add_column("STATUS", justify="center")
     table.add_column("TIME", justify="right", style="green")
+    return table
 
-    up_count, down_count = 0, 0
-    total_latency = 0
-
-    for server in servers_to_check:
-        res = results.get(server.name)
-        if not res: continue
-
-        if res.status == STATUS_OK:
-            up_count += 1
-            if res.latency is not None:
-                total_latency += res.latency
-            status_style = "[green]OK[/green]"
-            latency_str = f"{res.latency:4.2f} ms"
-            if not args.quiet:
-                table.add_row(res.server.name, res.server.ip, res.server.type, status_style, latency_str)
-        else:
-            down_count += 1
-            status_style = "[red]DOWN[/red]"
-            table.add_row(res.server.name, res.server.ip, res.server.type, status_style, "--")
+def display_results(servers_to_check: List[Server], results: PingResults, args: argparse.Namespace, console: Console):
+    """Builds and prints the results table and summary stats."""
+    statuses, latencies = results.statuses, results.latencies
+    up_count = statuses.count(RESULT_UP)
+    down_count = statuses.count(RESULT_DOWN)
+    # NaN marks servers without a latency; it's the only value not equal to itself
+    total_latency = math.fsum(latency for latency in latencies if latency == latency)
+
+    # Collect the rows to show first, then output them in one go. A quiet run
+    # where everything is up ends up with no rows, so no table is built.
+    rows: List[Tuple[str, str, str, str, str]] = []
+    for index, server in enumerate(servers_to_check):
+        status = statuses[index]
+        if status == RESULT_UP:
+            if args.quiet:
+                continue
+            rows.append((server.name, server.ip, server.type, STATUS_OK, f"{latencies[index]:4.2f} ms"))
+        elif status == RESULT_DOWN:
+            rows.append((server.name, server.ip, server.type, STATUS_DOWN, "--"))
+
+    avg_latency = (total_latency / up_count) if up_count > 0 else 0
+    if not console.is_terminal:
+        # Pipes, logs and cron mail get plain aligned lines instead of a Rich table
+        if rows:
+            console.out("\n".join([PLAIN_HEADER, *(PLAIN_ROW_FORMAT.format(*row) for row in rows)]), highlight=False)
+        elif not args.quiet:
+            console.out("No servers to display.")
+        console.out(f"STATS: {up_count}/{len(servers_to_check)} Online | {down_count} Down | Avg Latency: {avg_latency:.2f}ms", highlight=False)
+        return
 
-    if table.row_count > 0:
+    if rows:
+        table = new_results_table()
+        for name, ip, server_type, status_text, latency_str in rows:
+            table.add_row(name, ip, server_type, STATUS_MARKUP[status_text], latency_str)
         console.print(table)
     elif not args.quiet:
         console.print("[yellow]No servers to display.[/yellow]")
-
-    avg_latency = (total_latency / up_count) if up_count > 0 else 0
     console.print(f"STATS: [green]{up_count}/{len(servers_to_check)} Online[/] | [red]{down_count} Down[/] | Avg Latency: {avg_latency:.2f}ms")
 
-
 def run_check_command(args: argparse.Namespace, console: Console):
     """Runs the full server check process."""
     config_file = find_config_file()
@@ -271,8 +674,12 @@ def run_check_command(args: argparse.Namespace, console: Console):
         console.print("[bold red]Error:[/bold red] Configuration file not found in ~/.config/check-servers/ or /etc/check-servers/", style="error")
         return
 
-    settings, all_servers = parse_config(config_file)
-    
+    settings, all_servers = parse_config(config_file, dedupe=False)
+    all_servers, duplicates = dedupe_servers(all_servers)
+    for duplicate, first in duplicates:
+        console.print(f"[yellow]Warning:[/yellow] Skipping [cyan]{duplicate.name}[/cyan]: "
+                      f"{duplicate.ip} is already listed as [cyan]{first.name}[/cyan].")
+
     # The 'local' and 'remote' arguments will exist on the args namespace
     # because we are explicitly in the 'check' command context.
     servers_to_check = get_servers_to_check(all_servers, args)
@@ -308,7 +715,9 @@ def run():
     parser_remove = subparsers.add_parser("remove", help="Interactively remove a server from the configuration file.")
 
     args = parser.parse_args()
-    console = Console()
+    # The one console for the whole run; highlighting is off since all the
+    # styling is explicit markup.
+    console = Console(highlight=False)
 
     if args.command == "add":
         add_server_to_config(args.ip, args.name, args.type, console)
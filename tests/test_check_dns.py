@@ -0,0 +1,129 @@
+import json
+import time
+
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+import pytest
+
+import check.dns as check_dns
+from check.dns import (
+    ANSWER_CACHE,
+    get_cached_answer,
+    load_cache,
+    save_cache,
+    extract_answer,
+)
+
+@pytest.fixture(autouse=True)
+def cache_file(tmp_path, monkeypatch):
+    """Fixture to start each test with an empty cache stored under tmp_path."""
+    path = tmp_path / "cache.json"
+    monkeypatch.setattr(check_dns, "CACHE_FILE", path)
+    ANSWER_CACHE.clear()
+    yield path
+    ANSWER_CACHE.clear()
+
+
+def make_response(website, rdtype, answer=(), authority=(), rcode=dns.rcode.NOERROR):
+    """Builds a response to a query for `website`, with rrsets given as text lines."""
+    response = dns.message.make_response(dns.message.make_query(website, rdtype))
+    response.set_rcode(rcode)
+    for line in answer:
+        response.answer.append(dns.rrset.from_text(*line.split(maxsplit=4)))
+    for line in authority:
+        response.authority.append(dns.rrset.from_text(*line.split(maxsplit=4)))
+    return response
+
+
+def test_get_cached_answer_unexpired():
+    """Test that an unexpired answer is returned from the cache."""
+    key = ("10.0.0.5", "google.com", "A")
+    ANSWER_CACHE[key] = ("1.2.3.4", time.time() + 60)
+    assert get_cached_answer(key) == "1.2.3.4"
+
+
+def test_get_cached_answer_expired():
+    """Test that an expired answer is treated as missing and dropped from the cache."""
+    key = ("10.0.0.5", "google.com", "A")
+    ANSWER_CACHE[key] = ("1.2.3.4", time.time() - 1)
+    assert get_cached_answer(key) is None
+    assert key not in ANSWER_CACHE
+
+
+def test_save_and_load_cache(cache_file):
+    """Test that unexpired answers survive a save and load, and expired ones don't."""
+    now = time.time()
+    ANSWER_CACHE[("10.0.0.5", "google.com", "A")] = ("1.2.3.4", now + 60)
+    ANSWER_CACHE[("10.0.0.5", "github.com", "A")] = ("5.6.7.8", now - 1)
+    save_cache()
+    assert len(json.loads(cache_file.read_text())) == 1
+
+    ANSWER_CACHE.clear()
+    load_cache()
+    assert list(ANSWER_CACHE) == [("10.0.0.5", "google.com", "A")]
+
+
+def test_load_cache_drops_expired_entries(cache_file):
+    """Test that entries that expired since they were saved are not loaded."""
+    now = time.time()
+    cache_file.write_text(json.dumps([
+        ["10.0.0.5", "google.com", "A", "1.2.3.4", now + 60],
+        ["10.0.0.5", "github.com", "A", "5.6.7.8", now - 60],
+    ]))
+    load_cache()
+    assert list(ANSWER_CACHE) == [("10.0.0.5", "google.com", "A")]
+
+
+@pytest.mark.parametrize("content", ["not json", '{"a": 1}', '[["too", "short"]]'])
+def test_load_cache_ignores_corrupt_file(cache_file, content):
+    """Test that a corrupt cache file just leaves the cache empty."""
+    cache_file.write_text(content)
+    load_cache()
+    assert ANSWER_CACHE == {}
+
+
+def test_load_cache_missing_file():
+    """Test that a missing cache file just leaves the cache empty."""
+    load_cache()
+    assert ANSWER_CACHE == {}
+
+
+def test_extract_answer_cname_chain():
+    """Test that the record after a CNAME is returned, cached for the chain's shortest TTL."""
+    response = make_response("www.example.com", dns.rdatatype.A, answer=[
+        "www.example.com. 30 IN CNAME example.com.",
+        "example.com. 300 IN A 93.184.216.34",
+    ])
+    assert extract_answer(response, dns.rdatatype.A) == ("93.184.216.34", 30)
+
+
+def test_extract_answer_negative_uses_soa_minimum():
+    """Test that NXDOMAIN is cached for the lower of the SOA's TTL and minimum."""
+    response = make_response("missing.example.com", dns.rdatatype.A, rcode=dns.rcode.NXDOMAIN, authority=[
+        "example.com. 3600 IN SOA ns.example.com. admin.example.com. 1 7200 900 1209600 60",
+    ])
+    assert extract_answer(response, dns.rdatatype.A) == ("-", 60)
+
+
+def test_extract_answer_negative_uses_soa_ttl():
+    """Test that a missing record type is cached for the SOA's TTL when that's lower."""
+    response = make_response("example.com", dns.rdatatype.AAAA, authority=[
+        "example.com. 120 IN SOA ns.example.com. admin.example.com. 1 7200 900 1209600 3600",
+    ])
+    assert extract_answer(response, dns.rdatatype.AAAA) == ("-", 120)
+
+
+def test_extract_answer_servfail_not_cached():
+    """Test that a server failure is never cached, even alongside an SOA."""
+    response = make_response("example.com", dns.rdatatype.A, rcode=dns.rcode.SERVFAIL, authority=[
+        "example.com. 120 IN SOA ns.example.com. admin.example.com. 1 7200 900 1209600 60",
+    ])
+    assert extract_answer(response, dns.rdatatype.A) == ("-", None)
+
+
+def test_extract_answer_negative_without_soa_not_cached():
+    """Test that a negative answer without an SOA isn't cached, as it has no TTL."""
+    response = make_response("example.com", dns.rdatatype.A, rcode=dns.rcode.NXDOMAIN)
+    assert extract_answer(response, dns.rdatatype.A) == ("-", None)
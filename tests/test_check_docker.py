@@ -0,0 +1,200 @@
+from unittest.mock import patch, MagicMock
+
+import pytest
+from docker.errors import DockerException
+
+from check.docker import (
+    CLIENT_CACHE,
+    get_client,
+    close_clients,
+    format_ports,
+    get_container_details,
+    parse_config,
+)
+
+@pytest.fixture(autouse=True)
+def clear_client_cache():
+    """Fixture to stop cached Docker clients leaking between tests."""
+    CLIENT_CACHE.clear()
+    yield
+    CLIENT_CACHE.clear()
+
+
+def make_container(name, state="running", status="Up 3 hours", image_id="sha256:0123456789abcdef0123", networks=("bridge",), ports=()):
+    """Builds a container entry as returned by /containers/json."""
+    return {
+        'Names': [f"/{name}"],
+        'State': state,
+        'Status': status,
+        'ImageID': image_id,
+        'NetworkSettings': {'Networks': {network: {} for network in networks}},
+        'Ports': list(ports),
+    }
+
+
+@pytest.fixture
+def mock_client():
+    """Fixture to serve get_container_details from a mocked Docker API client."""
+    client = MagicMock()
+    with patch(f'{get_container_details.__module__}.get_client', return_value=client):
+        yield client
+
+
+@patch(f'{get_client.__module__}.kwargs_from_env', return_value={})
+@patch('docker.APIClient')
+def test_get_client_reused_per_host(mock_api_client, mock_kwargs):
+    """Test that each host gets one client, reused on later lookups."""
+    mock_api_client.side_effect = lambda **kwargs: MagicMock()
+
+    local = get_client()
+    remote = get_client("user@nas")
+
+    assert get_client() is local
+    assert get_client("user@nas") is remote
+    assert local is not remote
+    assert mock_api_client.call_count == 2
+    assert mock_api_client.call_args_list[1].kwargs == {'base_url': 'ssh://user@nas'}
+
+
+@patch(f'{get_client.__module__}.kwargs_from_env', return_value={})
+@patch('docker.APIClient')
+def test_close_clients(mock_api_client, mock_kwargs):
+    """Test that close_clients closes every cached client and empties the cache."""
+    mock_api_client.side_effect = lambda **kwargs: MagicMock()
+    clients = [get_client(), get_client("user@nas")]
+
+    close_clients()
+
+    for client in clients:
+        client.close.assert_called_once()
+    assert CLIENT_CACHE == {}
+
+
+def test_format_ports_published():
+    """Test a port published on the host."""
+    assert format_ports([{'IP': '0.0.0.0', 'PrivatePort': 80, 'PublicPort': 8080, 'Type': 'tcp'}]) == "0.0.0.0:8080->80/tcp"
+
+
+def test_format_ports_unpublished():
+    """Test a port that is exposed but not published."""
+    assert format_ports([{'PrivatePort': 53, 'Type': 'udp'}]) == "53/udp"
+
+
+def test_format_ports_ipv4_and_ipv6():
+    """Test a port published on both IPv4 and IPv6, which the daemon lists once per address."""
+    ports = [
+        {'IP': '0.0.0.0', 'PrivatePort': 80, 'PublicPort': 8080, 'Type': 'tcp'},
+        {'IP': '::', 'PrivatePort': 80, 'PublicPort': 8080, 'Type': 'tcp'},
+    ]
+    assert format_ports(ports) == "0.0.0.0:8080->80/tcp, :::8080->80/tcp"
+
+
+def test_format_ports_none():
+    """Test a container with no ports."""
+    assert format_ports([]) == "--"
+
+
+def test_get_container_details_filters_exact_names(mock_client):
+    """Test that the daemon is asked for anchored, escaped names only."""
+    mock_client.containers.return_value = []
+    get_container_details(["web", "db.1"])
+    mock_client.containers.assert_called_once_with(all=True, filters={"name": ["^/web$", r"^/db\.1$"]})
+
+
+def test_get_container_details_ignores_similar_names(mock_client):
+    """Test that containers whose names merely contain a requested name don't match it."""
+    mock_client.containers.return_value = [make_container("web-backup"), make_container("old-web"), make_container("db1")]
+    results = get_container_details(["web", "db.1"])
+    assert [(info.name, info.status) for info in results] == [("web", "Not Found"), ("db.1", "Not Found")]
+
+
+def test_get_container_details_running(mock_client):
+    """Test the uptime, image, network and port columns for a running container."""
+    mock_client.containers.return_value = [make_container(
+        "web", status="Up 3 hours (healthy)", networks=("bridge", "proxy"),
+        ports=[{'IP': '0.0.0.0', 'PrivatePort': 80, 'PublicPort': 8080, 'Type': 'tcp'}],
+    )]
+    [info] = get_container_details(["web"])
+    assert (info.status, info.uptime, info.image, info.networks, info.ports) == (
+        "running", "3 hours (healthy)", "sha256:0123456789ab", "bridge, proxy", "0.0.0.0:8080->80/tcp",
+    )
+
+
+def test_get_container_details_exited(mock_client):
+    """Test that an exited container has no uptime."""
+    mock_client.containers.return_value = [make_container("web", state="exited", status="Exited (0) 2 days ago")]
+    [info] = get_container_details(["web"])
+    assert (info.status, info.uptime) == ("exited", "--")
+
+
+@pytest.mark.parametrize("image_id, expected", [
+    ("sha256:0123456789abcdef0123", "sha256:0123456789ab"),
+    ("0123456789abcdef0123", "0123456789ab"),
+    ("", "--"),
+])
+def test_get_container_details_image(mock_client, image_id, expected):
+    """Test that image IDs are shortened like docker-py's Image.short_id."""
+    mock_client.containers.return_value = [make_container("web", image_id=image_id)]
+    [info] = get_container_details(["web"])
+    assert info.image == expected
+
+
+def test_get_container_details_missing(mock_client):
+    """Test that a container the daemon doesn't know about is reported as not found."""
+    mock_client.containers.return_value = []
+    [info] = get_container_details(["web"])
+    assert (info.status, info.uptime, info.image, info.networks, info.ports) == ("Not Found", "--", "--", "--", "--")
+
+
+def test_get_container_details_docker_error(mock_client):
+    """Test that every container is marked as failed when the daemon can't be reached."""
+    mock_client.containers.side_effect = DockerException("daemon not running")
+    results = get_container_details(["web", "db"])
+    assert [(info.name, info.status, info.networks) for info in results] == [
+        ("web", "FAIL", "daemon not running"), ("db", "FAIL", "daemon not running"),
+    ]
+
+
+def test_get_container_details_maps_exact_names(mock_client):
+    """Test that each requested name gets its own container, in the order requested."""
+    mock_client.containers.return_value = [
+        make_container("web-backup", state="exited"),
+        make_container("db", image_id="sha256:aaaaaaaaaaaaaaaaaaaa"),
+        make_container("web", image_id="sha256:bbbbbbbbbbbbbbbbbbbb"),
+    ]
+    results = get_container_details(["web", "cache", "db"])
+    assert [(info.name, info.status, info.image) for info in results] == [
+        ("web", "running", "sha256:bbbbbbbbbbbb"),
+        ("cache", "Not Found", "--"),
+        ("db", "running", "sha256:aaaaaaaaaaaa"),
+    ]
+
+
+def test_get_container_details_extra_names(mock_client):
+    """Test that a container listed under several names matches each requested one."""
+    container = make_container("web")
+    container['Names'].append("/frontend")
+    mock_client.containers.return_value = [container]
+    results = get_container_details(["frontend", "web"])
+    assert [(info.name, info.status) for info in results] == [("frontend", "running"), ("web", "running")]
+
+
+def test_parse_config_skips_comments_and_blank_lines(tmp_path):
+    """Test that comments, blank and whitespace-only lines are ignored."""
+    config = tmp_path / "servers.conf"
+    config.write_text("# Containers\nweb\n\n   \n  # indented comment\n  db  \n")
+    assert parse_config(config) == ["web", "db"]
+
+
+def test_parse_config_crlf(tmp_path):
+    """Test that a config saved with Windows line endings parses the same."""
+    config = tmp_path / "servers.conf"
+    config.write_bytes(b"# Containers\r\nweb\r\n\r\ndb\r\n")
+    assert parse_config(config) == ["web", "db"]
+
+
+def test_parse_config_duplicate_names(tmp_path):
+    """Test that repeated names are listed once, in the order first seen."""
+    config = tmp_path / "servers.conf"
+    config.write_text("web\ndb\nweb\ncache\ndb\n")
+    assert parse_config(config) == ["web", "db", "cache"]
@@ -1,51 +1,100 @@
 import argparse
+import asyncio
+import io
+import math
+import struct
 from pathlib import Path
-from unittest.mock import patch, MagicMock, mock_open
+from unittest.mock import patch, AsyncMock, MagicMock
 
+import icmplib
 import pytest
+from rich.console import Console
 
-# Import directly from the check_servers package.
-# Pytest handles the path automatically when run from the project root.
-from check_servers import (
+# Import directly from the check.servers package.
+# pytest puts src on the path (see [tool.pytest.ini_options] in pyproject.toml).
+from check.servers import (
     Server,
     PingResult,
+    PingResults,
     find_config_file,
     parse_config,
+    parse_config_file,
+    add_server_to_config,
+    remove_server_from_config,
+    is_system_config,
     ping_server,
+    PingSocket,
+    parse_icmp_reply,
+    ping_server_subprocess,
+    ping_servers_fping,
     get_servers_to_check,
+    run_pings,
+    run_check_command,
+    display_results,
     STATUS_OK,
-    STATUS_DOWN
+    STATUS_DOWN,
+    RESULT_UP,
+    RESULT_DOWN,
+    RESULT_NONE,
 )
 
+@pytest.fixture(autouse=True)
+def clear_config_caches():
+    """Fixture to stop cached config lookups and parses leaking between tests."""
+    find_config_file.cache_clear()
+    parse_config_file.cache_clear()
+    yield
+    find_config_file.cache_clear()
+    parse_config_file.cache_clear()
+
+
 @pytest.fixture
-def mock_home_dir(monkeypatch):
-    """Fixture to mock Path.home() to a temporary directory."""
-    def mock_home():
-        return Path("/fake/home")
-    monkeypatch.setattr(Path, "home", mock_home)
+def config_paths(tmp_path, monkeypatch):
+    """Fixture to point the user and system config paths into a temporary directory."""
+    module = find_config_file.__module__
+    user_dir = tmp_path / "home/.config/check-servers"
+    system_file = tmp_path / "etc/check-servers/servers.conf"
+    monkeypatch.setattr(f"{module}.USER_CONFIG_DIR", user_dir)
+    monkeypatch.setattr(f"{module}.USER_CONFIG_FILE", user_dir / "servers.conf")
+    monkeypatch.setattr(f"{module}.SYSTEM_CONFIG_FILE", system_file)
+    return user_dir / "servers.conf", system_file
+
 
+def create_file(path):
+    """Creates an empty file, along with any missing parent directories."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
 
-def test_find_config_file_user(mock_home_dir):
-    """Test finding the user config file."""
-    with patch('pathlib.Path.exists') as mock_exists:
-        mock_exists.side_effect = [True, False]
-        config_path = find_config_file()
-        assert config_path is not None
 
+def test_find_config_file_user(config_paths):
+    """Test finding the user config file, which takes precedence over the system one."""
+    user_file, system_file = config_paths
+    create_file(user_file)
+    create_file(system_file)
+    assert find_config_file() == user_file
 
-def test_find_config_file_system(mock_home_dir):
+
+def test_find_config_file_system(config_paths):
     """Test finding the system config file when user one doesn't exist."""
-    with patch('pathlib.Path.exists') as mock_exists:
-        # User config doesn't exist, system one does
-        mock_exists.side_effect = [False, True]
-        config_path = find_config_file()
-        assert config_path == Path("/etc/check-servers/servers.conf")
+    user_file, system_file = config_paths
+    # The user config directory exists but has no config file in it
+    user_file.parent.mkdir(parents=True)
+    create_file(system_file)
+    assert find_config_file() == system_file
 
 
-def test_find_config_file_none(mock_home_dir):
+def test_find_config_file_none(config_paths):
     """Test when no config file is found."""
-    with patch('pathlib.Path.exists', return_value=False):
-        assert find_config_file() is None
+    assert find_config_file() is None
+
+
+def test_find_config_file_cached(config_paths):
+    """Test that the config file is only looked up once per run."""
+    user_file, _ = config_paths
+    create_file(user_file)
+    assert find_config_file() == user_file
+    user_file.unlink()
+    assert find_config_file() == user_file
 
 
 @pytest.fixture
@@ -67,67 +116,483 @@ bad-line
 timeout=notanumber
 """
 
-def test_parse_config_success(sample_config_content):
+def test_parse_config_success(tmp_path, sample_config_content):
     """Test successful parsing of a valid config file."""
-    with patch("builtins.open", mock_open(read_data=sample_config_content)):
-        settings, servers = parse_config(Path("dummy.conf"))
+    config_file = tmp_path / "servers.conf"
+    config_file.write_text(sample_config_content)
+
+    settings, servers = parse_config(config_file)
 
-        assert settings['timeout'] == 0.5
-        assert settings['retries'] == 2
-        assert len(servers) == 3
-        assert Server(ip='127.0.0.1', name='localhost', type='local') in servers
-        assert Server(ip='10.0.0.1', name='router', type='local') in servers
-        assert Server(ip='8.8.8.8', name='google-dns', type='remote') in servers
+    assert settings['timeout'] == 0.5
+    assert settings['retries'] == 2
+    assert len(servers) == 3
+    assert Server(ip='127.0.0.1', name='localhost', type='local') in servers
+    assert Server(ip='10.0.0.1', name='router', type='local') in servers
+    assert Server(ip='8.8.8.8', name='google-dns', type='remote') in servers
 
 
-def test_parse_config_empty():
+def test_parse_config_empty(tmp_path):
     """Test parsing an empty config file."""
-    with patch("builtins.open", mock_open(read_data="")):
-        settings, servers = parse_config(Path("dummy.conf"))
-        assert settings['timeout'] == 0.2 # Default
-        assert settings['retries'] == 3    # Default
-        assert len(servers) == 0
+    config_file = tmp_path / "servers.conf"
+    config_file.write_text("")
+
+    settings, servers = parse_config(config_file)
+    assert settings['timeout'] == 0.2 # Default
+    assert settings['retries'] == 3    # Default
+    assert len(servers) == 0
+
+
+def test_parse_config_setting_types(tmp_path):
+    """Test that each setting is parsed as its own type, ignoring values of the wrong type."""
+    config_file = tmp_path / "servers.conf"
+    config_file.write_text("timeout = 1\nretries = 2.5\n")
+
+    settings, _ = parse_config(config_file)
+    assert settings['timeout'] == 1.0 and isinstance(settings['timeout'], float)
+    assert settings['retries'] == 3 # Default, as retries must be a whole number
+
+
+def test_parse_config_deduplicates_servers(tmp_path):
+    """Test that an address listed more than once is only checked once."""
+    config_file = tmp_path / "servers.conf"
+    config_file.write_text("[local]\n10.0.0.1 router\n10.0.0.1 router\n\n[remote]\n10.0.0.1 router-again\n8.8.8.8 google\n")
+
+    _, servers = parse_config(config_file)
+
+    assert servers == [
+        Server(ip='10.0.0.1', name='router', type='local'),
+        Server(ip='8.8.8.8', name='google', type='remote'),
+    ]
+
+
+def test_parse_config_cached(tmp_path):
+    """Test that an unchanged file is only parsed once, and callers can't alter the cached copy."""
+    config_file = tmp_path / "servers.conf"
+    config_file.write_text("timeout = 0.5\n[local]\n192.168.1.1 router\n")
+
+    settings, servers = parse_config(config_file)
+    settings['timeout'] = 9
+    servers.clear()
+    with patch('mmap.mmap') as mock_map:
+        assert parse_config(config_file) == ({'timeout': 0.5, 'retries': 3}, [Server('192.168.1.1', 'router', 'local')])
+        mock_map.assert_not_called()
+
+    config_file.write_text("timeout = 0.5\n[local]\n192.168.1.1 router\n192.168.1.2 nas\n")
+    _, servers = parse_config(config_file)
+    assert len(servers) == 2
+
+
+def test_parse_config_missing_file(tmp_path):
+    """Test that an unreadable config file raises a descriptive IOError."""
+    with pytest.raises(IOError, match="Error reading configuration file"):
+        parse_config(tmp_path / "missing.conf")
+
+
+def add_to_config(config_file, ip, name, server_type):
+    """Adds a server to the given config file, as if it were the one found, returning the output."""
+    output = io.StringIO()
+    with patch(f'{add_server_to_config.__module__}.find_config_file', return_value=config_file):
+        add_server_to_config(ip, name, server_type, Console(file=output, width=200))
+    return output.getvalue()
+
+
+def test_add_server_appends_to_last_section(tmp_path):
+    """Test that a server for the last section is appended to the end of the file."""
+    config_file = tmp_path / "servers.conf"
+    config_file.write_text("[local]\n192.168.1.1 router\n[remote]\n8.8.8.8 google\n")
+
+    add_to_config(config_file, '1.1.1.1', 'cloudflare', 'remote')
+
+    assert config_file.read_text().endswith("8.8.8.8 google\n1.1.1.1         cloudflare\n")
+    _, servers = parse_config(config_file)
+    assert [s.name for s in servers if s.type == 'remote'] == ['google', 'cloudflare']
+
+
+def test_add_server_inserts_into_earlier_section(tmp_path):
+    """Test that a server for a section followed by another is inserted under its header."""
+    config_file = tmp_path / "servers.conf"
+    config_file.write_text("[local]\n192.168.1.1 router\n[remote]\n8.8.8.8 google\n")
+
+    add_to_config(config_file, '192.168.1.2', 'nas', 'local')
+
+    _, servers = parse_config(config_file)
+    assert [s.name for s in servers if s.type == 'local'] == ['nas', 'router']
+    assert [s.name for s in servers if s.type == 'remote'] == ['google']
+
+
+def test_add_server_inserts_before_indented_header(tmp_path):
+    """Test that an indented header still counts as a later section when adding a server."""
+    config_file = tmp_path / "servers.conf"
+    config_file.write_text("[remote]\n8.8.8.8 g\n  [local]\n1.1.1.1 a\n")
+
+    add_to_config(config_file, '9.9.9.9', 'new', 'remote')
+
+    assert config_file.read_text() == "[remote]\n9.9.9.9         new\n8.8.8.8 g\n  [local]\n1.1.1.1 a\n"
+    _, servers = parse_config(config_file)
+    assert [(s.name, s.type) for s in servers] == [('new', 'remote'), ('g', 'remote'), ('a', 'local')]
+
+
+def test_add_server_creates_section(tmp_path):
+    """Test that a missing section is added to the end of the file."""
+    config_file = tmp_path / "servers.conf"
+    config_file.write_text("timeout = 0.5\n[local]\n192.168.1.1 router")
+
+    add_to_config(config_file, '8.8.8.8', 'google', 'remote')
+
+    settings, servers = parse_config(config_file)
+    assert settings['timeout'] == 0.5
+    assert [(s.name, s.type) for s in servers] == [('router', 'local'), ('google', 'remote')]
+
+
+def test_is_system_config(config_paths, tmp_path):
+    """Test that the system config is recognised through another path to it."""
+    _, system_file = config_paths
+    create_file(system_file)
+    (tmp_path / "link").symlink_to(system_file.parent)
+
+    assert is_system_config(tmp_path / "link/servers.conf")
+    assert not is_system_config(tmp_path / "missing.conf")
+
+
+def test_remove_server_from_config(tmp_path):
+    """Test that only the chosen server's line is removed and the file mode is kept."""
+    config_file = tmp_path / "servers.conf"
+    config_file.write_text("[local]\n192.168.1.1 router\n192.168.1.10 router2\n[remote]\n8.8.8.8 google\n")
+    config_file.chmod(0o600)
+    console = Console(file=io.StringIO())
+
+    with patch(f'{remove_server_from_config.__module__}.find_config_file', return_value=config_file), \
+         patch.object(console, 'input', return_value='1'):
+        remove_server_from_config(console)
+
+    assert config_file.read_text() == "[local]\n192.168.1.10 router2\n[remote]\n8.8.8.8 google\n"
+    assert config_file.stat().st_mode & 0o777 == 0o600
+    assert list(tmp_path.iterdir()) == [config_file]
+
+
+def test_remove_server_from_config_duplicate_ip(tmp_path):
+    """Test that a later entry for an address that's already listed can be removed."""
+    config_file = tmp_path / "servers.conf"
+    config_file.write_text("[local]\n10.0.0.1 router\n[remote]\n10.0.0.1 router-again\n8.8.8.8 google\n")
+    console = Console(file=io.StringIO())
+
+    with patch(f'{remove_server_from_config.__module__}.find_config_file', return_value=config_file), \
+         patch.object(console, 'input', return_value='2'):
+        remove_server_from_config(console)
+
+    assert config_file.read_text() == "[local]\n10.0.0.1 router\n[remote]\n8.8.8.8 google\n"
+
+
+def test_add_server_warns_about_duplicate_ip(tmp_path):
+    """Test that adding an address that's already listed warns that it won't be checked."""
+    config_file = tmp_path / "servers.conf"
+    config_file.write_text("[local]\n10.0.0.1 router\n")
+
+    output = add_to_config(config_file, '10.0.0.1', 'router-again', 'remote')
+
+    assert "10.0.0.1 is already listed as router" in output
+    _, servers = parse_config(config_file, dedupe=False)
+    assert [s.name for s in servers] == ['router', 'router-again']
+
+
+@patch(f'{run_check_command.__module__}.display_results')
+@patch(f'{run_check_command.__module__}.run_pings')
+def test_run_check_command_warns_about_duplicate_ip(mock_run_pings, mock_display, tmp_path):
+    """Test that checking warns about, and skips, entries for an address that's already listed."""
+    config_file = tmp_path / "servers.conf"
+    config_file.write_text("[local]\n10.0.0.1 router\n[remote]\n10.0.0.1 router-again\n")
+    output = io.StringIO()
+
+    with patch(f'{run_check_command.__module__}.find_config_file', return_value=config_file):
+        run_check_command(argparse.Namespace(local=False, remote=False, quiet=False), Console(file=output, width=200))
+
+    assert "Skipping router-again: 10.0.0.1 is already listed as router" in output.getvalue()
+    assert [s.name for s in mock_run_pings.call_args.args[0]] == ['router']
+
+
+def test_remove_server_from_config_cleans_up_on_failure(tmp_path):
+    """Test that a failed swap leaves the config untouched and no temporary file behind."""
+    config_file = tmp_path / "servers.conf"
+    config_file.write_text("[local]\n192.168.1.1 router\n")
+    console = Console(file=io.StringIO())
+
+    with patch(f'{remove_server_from_config.__module__}.find_config_file', return_value=config_file), \
+         patch.object(console, 'input', return_value='1'), \
+         patch('os.replace', side_effect=PermissionError):
+        with pytest.raises(PermissionError):
+            remove_server_from_config(console)
+
+    assert config_file.read_text() == "[local]\n192.168.1.1 router\n"
+    assert list(tmp_path.iterdir()) == [config_file]
+
+
+def mock_ping_process(returncode, stdout):
+    """Builds a mock asyncio subprocess for the ping command."""
+    process = MagicMock()
+    process.returncode = returncode
+    process.communicate = AsyncMock(return_value=(stdout, None))
+    return process
+
+
+def mock_pinger(**kwargs):
+    """Builds a mock PingSocket whose echo returns or raises as given."""
+    pinger = MagicMock()
+    pinger.echo = AsyncMock(**kwargs)
+    return pinger
+
+
+def test_ping_server_success():
+    """Test a successful ICMP ping."""
+    server = Server('1.1.1.1', 'one', 'remote')
+    pinger = mock_pinger(return_value=11.5)
+
+    result = asyncio.run(ping_server(server, timeout=0.2, retries=3, pinger=pinger))
+
+    assert result.status == STATUS_OK
+    assert result.latency == 11.5
+    assert pinger.echo.call_count == 1
+
+
+def test_ping_server_failure():
+    """Test a failed ICMP ping after retries."""
+    server = Server('10.255.255.1', 'down', 'local')
+    pinger = mock_pinger(return_value=None)
+
+    result = asyncio.run(ping_server(server, timeout=0.1, retries=3, pinger=pinger))
+
+    assert result.status == STATUS_DOWN
+    assert result.latency is None
+    assert pinger.echo.call_count == 3
+
+
+@patch('asyncio.create_subprocess_exec', new_callable=AsyncMock)
+def test_ping_server_falls_back_to_subprocess(mock_exec):
+    """Test that ping_server uses the ping command when ICMP sockets are not permitted."""
+    server = Server('1.1.1.1', 'one', 'remote')
+    pinger = mock_pinger(side_effect=icmplib.SocketPermissionError(False))
+    mock_exec.return_value = mock_ping_process(0, b"64 bytes from 1.1.1.1: icmp_seq=1 ttl=57 time=11.5 ms")
+
+    result = asyncio.run(ping_server(server, timeout=0.2, retries=1, pinger=pinger))
+
+    assert result.status == STATUS_OK
+    assert result.latency == 11.5
+    assert mock_exec.call_count == 1
+
+
+def icmp_message(icmp_type, ident=0x1234, sequence=7):
+    """Builds an ICMP message header (with a zero checksum) and a short payload."""
+    return struct.pack("!BBHHH", icmp_type, 0, 0, ident, sequence) + b"payload"
+
+
+IPV4_HEADER = bytes([0x45]) + bytes(19)
 
 
-@patch('subprocess.run')
-def test_ping_server_success(mock_run):
+def test_parse_icmp_reply_ipv4():
+    """Test parsing IPv4 echo replies with and without the IP header."""
+    assert parse_icmp_reply(IPV4_HEADER + icmp_message(0), ipv6=False, has_ip_header=True) == (0x1234, 7, True)
+    assert parse_icmp_reply(icmp_message(0), ipv6=False, has_ip_header=False) == (0x1234, 7, True)
+
+
+def test_parse_icmp_reply_ipv6():
+    """Test parsing an IPv6 echo reply, which never has the IP header."""
+    assert parse_icmp_reply(icmp_message(129), ipv6=True, has_ip_header=False) == (0x1234, 7, True)
+
+
+def test_parse_icmp_reply_error():
+    """Test that an error reply is matched to the echo request it quotes."""
+    unreachable = icmp_message(3, 0, 0)[:8] + IPV4_HEADER + icmp_message(8, 0x4321, 9)
+    assert parse_icmp_reply(IPV4_HEADER + unreachable, ipv6=False, has_ip_header=True) == (0x4321, 9, False)
+
+
+def test_parse_icmp_reply_ignores_other_packets():
+    """Test that echo requests, truncated packets and errors about other packets are ignored."""
+    assert parse_icmp_reply(IPV4_HEADER + icmp_message(8), ipv6=False, has_ip_header=True) is None
+    assert parse_icmp_reply(IPV4_HEADER + icmp_message(0)[:6], ipv6=False, has_ip_header=True) is None
+    not_ours = icmp_message(3, 0, 0)[:8] + IPV4_HEADER + icmp_message(13)
+    assert parse_icmp_reply(not_ours, ipv6=False, has_ip_header=False) is None
+
+
+@patch('asyncio.create_subprocess_exec', new_callable=AsyncMock)
+def test_ping_server_subprocess_success(mock_exec):
     """Test a successful ping."""
     server = Server('1.1.1.1', 'one', 'remote')
-    mock_result = MagicMock()
-    mock_result.returncode = 0
-    mock_result.stdout = "64 bytes from 1.1.1.1: icmp_seq=1 ttl=57 time=11.5 ms"
-    mock_run.return_value = mock_result
+    mock_exec.return_value = mock_ping_process(0, b"64 bytes from 1.1.1.1: icmp_seq=1 ttl=57 time=11.5 ms")
 
-    result = ping_server(server, timeout=0.2, retries=1)
+    result = asyncio.run(ping_server_subprocess(server, timeout=0.2, retries=1))
 
     assert result.status == STATUS_OK
     assert result.latency == 11.5
-    mock_run.assert_called_with(["ping", "-c", "1", "-W0.2", "1.1.1.1"], capture_output=True, text=True)
+    assert mock_exec.call_args.args == ("ping", "-c", "1", "-W0.2", "-i", "0.2", "1.1.1.1")
+
+
+@patch('asyncio.create_subprocess_exec', new_callable=AsyncMock)
+def test_ping_server_subprocess_summary(mock_exec):
+    """Test that the average from the ping summary line is used when present."""
+    server = Server('1.1.1.1', 'one', 'remote')
+    mock_exec.return_value = mock_ping_process(0, (
+        b"64 bytes from 1.1.1.1: icmp_seq=1 ttl=57 time=11.5 ms\n"
+        b"64 bytes from 1.1.1.1: icmp_seq=2 ttl=57 time=12.5 ms\n"
+        b"rtt min/avg/max/mdev = 11.500/12.000/12.500/0.500 ms\n"
+    ))
+
+    result = asyncio.run(ping_server_subprocess(server, timeout=0.2, retries=2))
+
+    assert result.status == STATUS_OK
+    assert result.latency == 12.0
 
 
-@patch('subprocess.run')
-def test_ping_server_failure(mock_run):
+@patch('asyncio.create_subprocess_exec', new_callable=AsyncMock)
+def test_ping_server_subprocess_failure(mock_exec):
     """Test a failed ping after retries."""
     server = Server('10.255.255.1', 'down', 'local')
-    mock_result = MagicMock()
-    mock_result.returncode = 1
-    mock_result.stdout = ""
-    mock_run.return_value = mock_result
+    mock_exec.return_value = mock_ping_process(1, b"")
 
-    result = ping_server(server, timeout=0.1, retries=3)
+    result = asyncio.run(ping_server_subprocess(server, timeout=0.1, retries=3))
 
     assert result.status == STATUS_DOWN
     assert result.latency is None
-    assert mock_run.call_count == 3
+    # All retries are sent by a single ping process
+    assert mock_exec.call_count == 1
+    assert mock_exec.call_args.args[:3] == ("ping", "-c", "3")
 
 
-@patch('subprocess.run', side_effect=FileNotFoundError)
-def test_ping_server_command_not_found(mock_run):
-    """Test that ping_server raises FileNotFoundError if ping command is missing."""
+@patch('asyncio.create_subprocess_exec', new_callable=AsyncMock, side_effect=FileNotFoundError)
+def test_ping_server_subprocess_command_not_found(mock_exec):
+    """Test that ping_server_subprocess raises FileNotFoundError if ping command is missing."""
     server = Server('127.0.0.1', 'localhost', 'local')
     # The exception is caught in run_pings, so we test that it's raised here.
     with pytest.raises(FileNotFoundError):
-        ping_server(server, timeout=0.1, retries=1)
+        asyncio.run(ping_server_subprocess(server, timeout=0.1, retries=1))
+
+
+@patch.object(PingSocket, 'echo', new_callable=AsyncMock)
+def test_run_pings(mock_echo):
+    """Test that every server is pinged and its result stored at the server's index."""
+    servers = [Server('1.1.1.1', 'one', 'remote'), Server('10.255.255.1', 'down', 'local')]
+    mock_echo.side_effect = lambda address, timeout: 11.5 if address == '1.1.1.1' else None
+
+    results = run_pings(servers, {'timeout': 0.2, 'retries': 3}, Console(file=io.StringIO()))
+
+    assert list(results.statuses) == [RESULT_UP, RESULT_DOWN]
+    assert results.latencies[0] == 11.5
+    assert math.isnan(results.latencies[1])
+
+
+@patch.object(PingSocket, 'echo', new_callable=AsyncMock)
+def test_run_pings_unresolvable_host(mock_echo):
+    """Test that a host that fails to resolve is reported down without affecting the others."""
+    servers = [Server('bad.host', 'bad', 'remote'), Server('8.8.8.8', 'two', 'remote')]
+    def fake_echo(address, timeout):
+        if address == 'bad.host':
+            raise icmplib.NameLookupError(address)
+        return 5.0
+    mock_echo.side_effect = fake_echo
+
+    results = run_pings(servers, {'timeout': 0.2, 'retries': 1}, Console(file=io.StringIO()))
+
+    assert list(results.statuses) == [RESULT_DOWN, RESULT_UP]
+    assert results.latencies[1] == 5.0
+
+
+@patch('rich.progress.Progress.update')
+@patch.object(PingSocket, 'echo', new_callable=AsyncMock, return_value=1.0)
+def test_run_pings_coalesces_progress_updates(mock_echo, mock_update):
+    """Test that a burst of results advances the progress bar in a few batched updates."""
+    servers = [Server(f'10.0.0.{i}', f'server{i}', 'local') for i in range(100)]
+
+    run_pings(servers, {'timeout': 0.2, 'retries': 1}, Console(file=io.StringIO()))
+
+    assert mock_update.call_count < 10
+    assert sum(call.kwargs['advance'] for call in mock_update.call_args_list) == 100
+
+
+@patch('asyncio.create_subprocess_exec', new_callable=AsyncMock)
+def test_ping_servers_fping(mock_exec):
+    """Test that one fping run pings every server and its summary is parsed."""
+    servers = [Server('1.1.1.1', 'one', 'remote'), Server('10.255.255.1', 'down', 'local'), Server('bad.host', 'bad', 'remote')]
+    process = MagicMock()
+    process.communicate = AsyncMock(return_value=(None, (
+        b"bad.host: Name or service not known\n"
+        b"1.1.1.1      : 11.5 - 12.5\n"
+        b"10.255.255.1 : - - -\n"
+    )))
+    mock_exec.return_value = process
+
+    results = asyncio.run(ping_servers_fping(servers, timeout=0.2, retries=3))
+
+    assert list(results.statuses) == [RESULT_UP, RESULT_DOWN, RESULT_DOWN]
+    assert results.latencies[0] == 12.0
+    assert mock_exec.call_count == 1
+    assert mock_exec.call_args.args[1:] == ("-q", "-C", "3", "-p", "200", "-t", "200", "1.1.1.1", "10.255.255.1", "bad.host")
+
+
+@patch(f'{run_pings.__module__}.FPING_PATH', '/usr/bin/fping')
+@patch(f'{run_pings.__module__}.icmp_sockets_permitted', return_value=False)
+@patch(f'{run_pings.__module__}.ping_servers_fping', new_callable=AsyncMock)
+def test_run_pings_uses_fping_without_icmp_sockets(mock_fping, mock_permitted):
+    """Test that run_pings hands every server to fping when ICMP sockets are not permitted."""
+    servers = [Server('1.1.1.1', 'one', 'remote')]
+    mock_fping.return_value = PingResults.empty(1)
+
+    results = run_pings(servers, {'timeout': 0.2, 'retries': 3}, Console(file=io.StringIO()))
+
+    assert results is mock_fping.return_value
+    mock_fping.assert_called_once_with(servers, 0.2, 3)
+
+
+def test_display_results_quiet_shows_only_down(all_servers_list):
+    """Test that quiet mode only lists servers that are down, but still counts the rest."""
+    results = PingResults.empty(len(all_servers_list))
+    for index, server in enumerate(all_servers_list):
+        results.record(index, PingResult(server, STATUS_DOWN if server.name == 'router' else STATUS_OK, 1.0))
+    output = io.StringIO()
+
+    display_results(all_servers_list, results, argparse.Namespace(quiet=True), Console(file=output, width=120))
+
+    assert 'router' in output.getvalue()
+    assert 'google' not in output.getvalue()
+    assert '3/4 Online' in output.getvalue()
+
+
+def test_display_results_quiet_all_up(all_servers_list):
+    """Test that quiet mode prints only the stats line when everything is up."""
+    results = PingResults.empty(len(all_servers_list))
+    for index, server in enumerate(all_servers_list):
+        results.record(index, PingResult(server, STATUS_OK, 1.0))
+    output = io.StringIO()
+
+    display_results(all_servers_list, results, argparse.Namespace(quiet=True), Console(file=output, width=120))
+
+    assert output.getvalue().splitlines() == ['STATS: 4/4 Online | 0 Down | Avg Latency: 1.00ms']
+
+
+def test_display_results_plain_when_not_a_terminal(all_servers_list):
+    """Test that output that isn't a terminal gets plain lines with no table borders."""
+    results = PingResults.empty(2)
+    results.record(0, PingResult(all_servers_list[0], STATUS_OK, 0.5))
+    results.record(1, PingResult(all_servers_list[1], STATUS_DOWN))
+    output = io.StringIO()
+
+    display_results(all_servers_list[:2], results, argparse.Namespace(quiet=False), Console(file=output, width=120))
+
+    lines = output.getvalue().splitlines()
+    assert lines[0].split() == ['SERVER', 'ADDRESS', 'TYPE', 'STATUS', 'TIME']
+    assert lines[1].split() == ['localhost', '127.0.0.1', 'local', 'OK', '0.50', 'ms']
+    assert lines[2].split() == ['router', '192.168.1.1', 'local', 'DOWN', '--']
+    assert lines[3] == 'STATS: 1/2 Online | 1 Down | Avg Latency: 0.50ms'
+
+
+def test_display_results_skips_unchecked(all_servers_list):
+    """Test that servers whose check failed are neither listed nor counted."""
+    results = PingResults.empty(len(all_servers_list))
+    results.record(0, PingResult(all_servers_list[0], STATUS_OK, 2.0))
+    output = io.StringIO()
+
+    display_results(all_servers_list, results, argparse.Namespace(quiet=False), Console(file=output, width=120))
+
+    assert results.statuses.count(RESULT_NONE) == 3
+    assert 'router' not in output.getvalue()
+    assert 'STATS: 1/4 Online | 0 Down | Avg Latency: 2.00ms' in output.getvalue()
 
 
 @pytest.fixture
@@ -161,4 +626,11 @@ def test_get_servers_to_check_all_both_specified(all_servers_list):
     args = argparse.Namespace(local=True, remote=True)
     result = get_servers_to_check(all_servers_list, args)
     assert len(result) == 4
-    assert result == all_servers_list
\ No newline at end of file
+    assert result == all_servers_list
+
+
+def test_get_servers_to_check_all_of_type(all_servers_list):
+    """Test that the list is returned as is when every server is of the requested type."""
+    local_servers = all_servers_list[:2]
+    args = argparse.Namespace(local=True, remote=False)
+    assert get_servers_to_check(local_servers, args) is local_servers